@@ -1,12 +1,24 @@
 import json
+import os
+import secrets
+import signal
+import socket
 import subprocess
 import re
 import time
 import threading
+from collections import deque
+import concurrent.futures
 from pathlib import Path
 from datetime import datetime
 import logging
-import shutil
+
+import requests
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -24,32 +36,96 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+_INVALID_CHARS_RE = re.compile(r'[\\/:*?"<>|]')
+_WS_RE = re.compile(r'\s+')
+if sys.platform == 'win32':
+    _WIN_STARTUPINFO = subprocess.STARTUPINFO()
+    _WIN_STARTUPINFO.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    _WIN_STARTUPINFO.wShowWindow = subprocess.SW_HIDE
+    _WIN_CREATIONFLAGS = subprocess.CREATE_NO_WINDOW | subprocess.CREATE_NEW_PROCESS_GROUP
+else:
+    _WIN_STARTUPINFO = None
+    _WIN_CREATIONFLAGS = 0
+
+_AUDIO_QUALITIES = frozenset(('48k', '128k'))
+_ARIA2_STATUS_KEYS = ['status', 'totalLength', 'completedLength', 'errorCode', 'errorMessage']
+
 class DownloadManager:
-    def __init__(self, log_callback=None, progress_callback=None):
+    def __init__(self, log_callback=None, progress_callback=None, progress_callback_batch=None):
         self.log_callback = log_callback or self._default_log
         self.progress_callback = progress_callback or self._default_progress
+        self.progress_callback_batch = progress_callback_batch
+        self._log_debug_enabled = config.DEBUG_MODE or (
+            log_callback is None and logger.isEnabledFor(logging.DEBUG)
+        )
         
-        self.pending_queue = []
+        self.pending_queue = deque()
         self.processing_queue = []
-        self.download_queue = []
+        self.download_queue = deque()
+        self._queue_lock = threading.Lock()
+        self._items_by_id = {}
+        self._tls = threading.local()
         self.downloading = []
         self.completed_list = []
         self.failed_list = []
         
-        self.paused = False
-        self.stopped = False
+        self._pause_event = threading.Event()
+        self._pause_event.set()
+        self._stop_event = threading.Event()
         self.active_generators = 0
         self.download_progress = {}
         self.active_downloads = []
         self.active_processes = {}
         
-        self.aria2_temp_folder = None
+        self._download_folder = None
+        self._temp_folder = None
+        self._aria2_path = None
+        self._aria2_rpc = None
+        self._rpc_url = None
+        self._rpc_secret = secrets.token_hex(16)
+        self._rpc_session = requests.Session()
+        self._rpc_session.trust_env = False
+        self._rpc_lock = threading.Lock()
+        
+        self.gen_pool = None
+        self.dl_pool = None
+        self._pool_sizes = None
+        
+        self._db_lock = threading.Lock()
+        self._db_dirty = threading.Event()
+        self._db_writer = threading.Thread(target=self._database_writer, name="db-writer", daemon=True)
+        self._db_writer.start()
+        
+        self._last_cb = {}
+        self._pending_progress = {}
+        self._progress_lock = threading.Lock()
+        self._progress_dirty = threading.Event()
+        if self.progress_callback_batch:
+            self._progress_flusher = threading.Thread(target=self._flush_progress, name="progress", daemon=True)
+            self._progress_flusher.start()
+    
+    @property
+    def stopped(self):
+        return self._stop_event.is_set()
+    
+    @stopped.setter
+    def stopped(self, value):
+        if value:
+            self._stop_event.set()
+        else:
+            self._stop_event.clear()
+    
+    @property
+    def paused(self):
+        return not self._pause_event.is_set()
     
     def _default_log(self, msg, level="INFO"):
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        logger.log(getattr(logging, level, logging.INFO), msg)
-        if config.DEBUG_MODE or level in ["ERROR", "WARNING"]:
-            print(f"[{timestamp}] [{level}] {msg}")
+        lvl = getattr(logging, level, logging.INFO)
+        if not logger.isEnabledFor(lvl):
+            return
+        logger.log(lvl, msg)
+        if config.DEBUG_MODE or lvl >= logging.WARNING:
+            print(f"[{datetime.now():%H:%M:%S}] [{level}] {msg}")
     
     def _default_progress(self, item_id, percent, status=""):
         pass
@@ -58,28 +134,68 @@ class DownloadManager:
         self.log_callback(msg, level)
     
     def progress(self, item_id, percent, status=""):
-        self.download_progress[item_id] = percent
+        item = self._items_by_id.get(item_id)
+        if item is not None:
+            item['_percent'] = percent
+        
+        if self.progress_callback_batch:
+            with self._progress_lock:
+                self._pending_progress[item_id] = (percent, status)
+            self._progress_dirty.set()
+            return
+        
+        current_time = time.time()
+        last_time, last_status = self._last_cb.get(item_id, (0, None))
+        if status == last_status and percent < 100 and current_time - last_time < 0.25:
+            return
+        
+        self._last_cb[item_id] = (current_time, status)
         self.progress_callback(item_id, percent, status)
     
-    def _ensure_aria2_temp_folder(self):
-        if not self.aria2_temp_folder:
-            download_folder = config.get_download_folder()
-            self.aria2_temp_folder = download_folder / "aria2c_temp"
-            self.aria2_temp_folder.mkdir(exist_ok=True)
-            self.log(f"Pasta temporária aria2c criada: {self.aria2_temp_folder}", "DEBUG")
-        return self.aria2_temp_folder
+    def _flush_progress(self):
+        while True:
+            self._progress_dirty.wait()
+            time.sleep(0.25)
+            self._progress_dirty.clear()
+            
+            with self._progress_lock:
+                updates = self._pending_progress
+                self._pending_progress = {}
+            
+            for item_id, (percent, _) in updates.items():
+                self.download_progress[item_id] = percent
+            
+            try:
+                self.progress_callback_batch(updates)
+            except Exception as e:
+                self.log(f"Erro ao atualizar progresso: {str(e)[:80]}", "ERROR")
+    
+    def get_progress(self, item_id):
+        item = self._items_by_id.get(item_id)
+        if item is None:
+            return 0
+        return item['_percent']
+    
+    def _lazy_folders(self):
+        download_folder = config.get_download_folder()
+        temp_folder = download_folder / "aria2c_temp"
+        temp_folder.mkdir(exist_ok=True)
+        self._temp_folder = temp_folder
+        self._download_folder = download_folder
+        if self._log_debug_enabled:
+            self.log(f"Pasta temporária aria2c criada: {temp_folder}", "DEBUG")
     
     def _move_from_temp_to_final(self, temp_file, final_file):
         try:
-            if temp_file.exists():
-                if final_file.exists():
-                    final_file.unlink()
-                shutil.move(str(temp_file), str(final_file))
+            os.replace(temp_file, final_file)
+            if self._log_debug_enabled:
                 self.log(f"Arquivo movido para: {final_file.name}", "DEBUG")
-                return True
-        except Exception as e:
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError as e:
             self.log(f"Erro ao mover arquivo: {str(e)[:50]}", "ERROR")
-        return False
+            return False
     
     def add_to_queue(self, youtube_url, quality="480p"):
         item = {
@@ -93,104 +209,214 @@ class DownloadManager:
             'error': None,
             'retry_count': 0,
             'download_retry_count': 0,
-            'last_retry_time': 0
+            'last_retry_time': 0,
+            'last_attempt': 0.0,
+            'channel': None,
+            'extension': None,
+            'timestamp': None,
+            '_percent': 0
         }
         
-        self.pending_queue.append(item)
+        with self._queue_lock:
+            self.pending_queue.append(item)
+        self._items_by_id[item['id']] = item
         self.save_database()
         self.log(f"Vídeo adicionado na fila: {youtube_url[:50]}... (Qualidade: {quality})")
         return item['id']
     
+    def get_pending_items(self):
+        with self._queue_lock:
+            return list(self.pending_queue)
+    
+    def remove_pending_item(self, item):
+        with self._queue_lock:
+            for index, queued in enumerate(self.pending_queue):
+                if queued is item:
+                    del self.pending_queue[index]
+                    break
+            else:
+                return False
+        self.save_database()
+        return True
+    
+    def clear_pending(self):
+        with self._queue_lock:
+            count = len(self.pending_queue)
+            self.pending_queue.clear()
+        self.save_database()
+        return count
+    
     def _clean_filename(self, filename):
-        invalid_chars = r'[\/:*?"<>|]'
-        cleaned = re.sub(invalid_chars, '', filename)
-        
-        cleaned = re.sub(r'\s+', ' ', cleaned).strip()
-        
-        if len(cleaned) > 100:
-            cleaned = cleaned[:100]
-            
-        return cleaned
+        cleaned = _WS_RE.sub(' ', _INVALID_CHARS_RE.sub('', filename)).strip()
+        return cleaned[:100]
     
     def _find_aria2(self):
+        if self._aria2_path:
+            return self._aria2_path
+        
         if config.ARIA2C_PATH.exists():
-            return str(config.ARIA2C_PATH)
+            self._aria2_path = str(config.ARIA2C_PATH)
+            return self._aria2_path
         
         try:
             result = subprocess.run(['aria2c', '--version'], 
                                   capture_output=True, 
                                   timeout=5)
             if result.returncode == 0:
-                return 'aria2c'
+                self._aria2_path = 'aria2c'
         except:
             pass
         
-        return None
+        return self._aria2_path
     
-    def _parse_aria2_progress(self, output):
-        if not output:
-            return 0
+    def _ensure_aria2_rpc(self):
+        with self._rpc_lock:
+            if self._aria2_rpc and self._aria2_rpc.poll() is None:
+                return True
+            
+            aria2_path = self._find_aria2()
+            if not aria2_path:
+                return False
+            
+            port = self._free_port()
+            self._rpc_url = f"http://127.0.0.1:{port}/jsonrpc"
+            
+            cmd = [
+                aria2_path,
+                '--enable-rpc',
+                f'--rpc-listen-port={port}',
+                f'--rpc-secret={self._rpc_secret}',
+                '--rpc-max-request-size=10M',
+                '--max-concurrent-downloads=16',
+                f'--stop-with-process={os.getpid()}',
+                '--check-certificate=false',
+                '--retry-wait=5',
+                '--max-tries=5',
+                '--timeout=60',
+                '--connect-timeout=30',
+                '--max-file-not-found=5',
+                '--allow-overwrite=true',
+                '--auto-file-renaming=false',
+                '--continue=true',
+                '--file-allocation=none',
+                '--console-log-level=warn',
+                '--summary-interval=0',
+                '--show-console-readout=false',
+            ]
+            
+            self._aria2_rpc = subprocess.Popen(
+                cmd,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                startupinfo=_WIN_STARTUPINFO,
+                creationflags=_WIN_CREATIONFLAGS
+            )
+            
+            for _ in range(50):
+                try:
+                    self._rpc('aria2.getVersion')
+                    if self._log_debug_enabled:
+                        self.log(f"aria2c RPC iniciado na porta {port}", "DEBUG")
+                    return True
+                except Exception:
+                    if self._aria2_rpc.poll() is not None:
+                        break
+                    time.sleep(0.2)
+            
+            self.log("Falha ao iniciar aria2c RPC", "ERROR")
+            self._aria2_rpc.terminate()
+            self._aria2_rpc = None
+            return False
+    
+    @staticmethod
+    def _free_port():
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.bind(('127.0.0.1', 0))
+            return sock.getsockname()[1]
+    
+    def _stop_aria2_rpc(self):
+        if not self._aria2_rpc:
+            return
         
-        pattern = r'\((\d+)%\)'
-        match = re.search(pattern, output)
-        if match:
-            return int(match.group(1))
+        process = self._aria2_rpc
+        self._aria2_rpc = None
         
-        pattern2 = r'(\d+)%\s+'
-        match2 = re.search(pattern2, output)
-        if match2:
-            return int(match2.group(1))
+        self._rpc_quiet('aria2.shutdown')
+        try:
+            process.wait(timeout=5)
+            return
+        except subprocess.TimeoutExpired:
+            pass
         
-        pattern3 = r'(\d+\.?\d?)%'
-        match3 = re.search(pattern3, output)
-        if match3:
+        if sys.platform == 'win32':
             try:
-                return int(float(match3.group(1)))
-            except:
-                return 0
+                os.kill(process.pid, signal.CTRL_BREAK_EVENT)
+                process.wait(timeout=5)
+                return
+            except (OSError, subprocess.TimeoutExpired):
+                pass
         
-        return 0
+        process.terminate()
+    
+    def _rpc(self, method, *params):
+        payload = {
+            'jsonrpc': '2.0',
+            'id': 'kobeni',
+            'method': method,
+            'params': [f'token:{self._rpc_secret}', *params]
+        }
+        response = self._rpc_session.post(self._rpc_url, json=payload, timeout=10)
+        data = response.json()
+        if 'error' in data:
+            raise RuntimeError(data['error'].get('message', 'Erro RPC aria2c'))
+        return data['result']
+    
+    def _rpc_quiet(self, method, *params):
+        try:
+            return self._rpc(method, *params)
+        except Exception:
+            return None
+    
+    def _discard_download(self, item_id):
+        gid = self.active_processes.pop(item_id, None)
+        if gid:
+            self._rpc_quiet('aria2.remove', gid)
+            self._rpc_quiet('aria2.removeDownloadResult', gid)
     
     def _find_item_by_id(self, item_id):
-        all_items = (self.pending_queue + self.processing_queue + 
-                     self.download_queue + self.downloading + 
-                     self.completed_list + self.failed_list)
-        
-        for item in all_items:
-            if item.get('id') == item_id:
-                return item
-        return None
+        return self._items_by_id.get(item_id)
+    
+    def _get_generator(self):
+        generator = getattr(self._tls, 'generator', None)
+        if generator is None:
+            generator = LinkGenerator(log_callback=self.log_callback, stop_event=self._stop_event)
+            self._tls.generator = generator
+        return generator
     
     def _generator_worker(self, quality):
-        generator = LinkGenerator(log_callback=self.log_callback)
+        generator = self._get_generator()
         
         max_links_to_generate = config.get_max_downloads() * 2
         link_count = 0
         
-        while not self.stopped and self.pending_queue and link_count < max_links_to_generate:
-            if self.stopped:
+        while link_count < max_links_to_generate:
+            if self._stop_event.is_set():
                 break
-                
-            item = None
-            try:
-                if self.pending_queue:
-                    item = self.pending_queue.pop(0)
-                else:
-                    break
-            except:
-                time.sleep(1)
-                continue
             
-            if self.stopped:
-                if item:
-                    self.pending_queue.insert(0, item)
+            try:
+                with self._queue_lock:
+                    item = self.pending_queue.popleft()
+            except IndexError:
                 break
             
             current_time = time.time()
-            if item.get('last_attempt', 0) > current_time - 30:
-                self.log(f"Aguardando antes de reprocessar: {item.get('title', 'item')[:30]}...", "DEBUG")
-                self.pending_queue.append(item)
-                time.sleep(5)
+            if item['last_attempt'] > current_time - 30:
+                if self._log_debug_enabled:
+                    self.log(f"Aguardando antes de reprocessar: {item['title'][:30]}...", "DEBUG")
+                with self._queue_lock:
+                    self.pending_queue.append(item)
+                if self._stop_event.wait(5):
+                    break
                 continue
             
             item['last_attempt'] = current_time
@@ -198,12 +424,20 @@ class DownloadManager:
             item['status'] = 'processing'
             self.save_database()
             
-            item_quality = item.get('quality', quality)
+            item_quality = item['quality']
+            if self._stop_event.is_set():
+                self._requeue_processing(item)
+                break
+            
             self.log(f"Gerando link: {item['youtube_url'][:50]}... ({item_quality})")
             
             try:
                 result = generator.generate_link(item['youtube_url'], item_quality)
                 
+                if self._stop_event.is_set():
+                    self._requeue_processing(item)
+                    break
+                
                 if result:
                     item.update(result)
                     item['status'] = 'ready_to_download'
@@ -213,17 +447,20 @@ class DownloadManager:
                     item['retry_count'] = 0
                     
                     self.processing_queue.remove(item)
-                    self.download_queue.append(item)
+                    with self._queue_lock:
+                        self.download_queue.append(item)
                     
                     self.progress(item['id'], 100, f"Link pronto")
                     self.log(f"Link gerado: {item['title'][:50]}...")
                 else:
-                    item['retry_count'] = item.get('retry_count', 0) + 1
+                    item['retry_count'] = item['retry_count'] + 1
                     
                     if item['retry_count'] <= 2:
                         self.log(f"Falha ao gerar link, recolocando na fila (tentativa {item['retry_count']}/3)", "WARNING")
-                        self.pending_queue.insert(0, item)
-                        time.sleep(10)
+                        with self._queue_lock:
+                            self.pending_queue.append(item)
+                        if self._stop_event.wait(10):
+                            break
                     else:
                         item['status'] = 'failed'
                         item['error'] = "Falha após 3 tentativas"
@@ -236,6 +473,10 @@ class DownloadManager:
                         self.log(f"Erro ao gerar link após 3 tentativas", "ERROR")
             
             except Exception as e:
+                if self._stop_event.is_set():
+                    self._requeue_processing(item)
+                    break
+                
                 item['status'] = 'failed'
                 item['error'] = str(e)[:80]
                 
@@ -248,58 +489,46 @@ class DownloadManager:
             
             self.save_database()
             link_count += 1
-            time.sleep(2)
+            if self._stop_event.wait(2):
+                break
         
         self.active_generators -= 1
-        self.log(f"Gerador finalizou. Links gerados: {link_count}", "DEBUG")
+        if self._log_debug_enabled:
+            self.log(f"Gerador finalizou. Links gerados: {link_count}", "DEBUG")
     
     def _generate_additional_links(self, num_links, quality):
         if not self.pending_queue or num_links <= 0:
             return
         
-        self.log(f"Gerando {num_links} links adicionais...", "DEBUG")
+        if self._log_debug_enabled:
+            self.log(f"Gerando {num_links} links adicionais...", "DEBUG")
         
-        threads = []
-        for _ in range(min(num_links, len(self.pending_queue))):
-            thread = threading.Thread(
-                target=self._single_generator_worker,
-                args=(quality,),
-                daemon=True
-            )
-            thread.start()
-            threads.append(thread)
-            time.sleep(0.5)
-        
-        for thread in threads:
-            try:
-                thread.join(timeout=300)
-            except:
-                pass
+        futures = [
+            self.gen_pool.submit(self._single_generator_worker, quality)
+            for _ in range(min(num_links, len(self.pending_queue)))
+        ]
+        _, not_done = concurrent.futures.wait(futures, timeout=300)
+        for future in not_done:
+            future.cancel()
     
     def _single_generator_worker(self, quality):
-        generator = LinkGenerator(log_callback=self.log_callback)
+        generator = self._get_generator()
         
-        if not self.pending_queue or self.stopped:
+        if self._stop_event.is_set():
             return
         
-        item = None
         try:
-            if self.pending_queue:
-                item = self.pending_queue.pop(0)
-            else:
-                return
-        except:
-            return
-        
-        if self.stopped:
-            if item:
-                self.pending_queue.insert(0, item)
+            with self._queue_lock:
+                item = self.pending_queue.popleft()
+        except IndexError:
             return
         
         current_time = time.time()
-        if item.get('last_attempt', 0) > current_time - 30:
-            self.log(f"Aguardando antes de reprocessar link adicional", "DEBUG")
-            self.pending_queue.append(item)
+        if item['last_attempt'] > current_time - 30:
+            if self._log_debug_enabled:
+                self.log(f"Aguardando antes de reprocessar link adicional", "DEBUG")
+            with self._queue_lock:
+                self.pending_queue.append(item)
             return
         
         item['last_attempt'] = current_time
@@ -307,11 +536,18 @@ class DownloadManager:
         item['status'] = 'processing'
         self.save_database()
         
-        item_quality = item.get('quality', quality)
+        item_quality = item['quality']
+        if self._stop_event.is_set():
+            self._requeue_processing(item)
+            return
         
         try:
             result = generator.generate_link(item['youtube_url'], item_quality)
             
+            if self._stop_event.is_set():
+                self._requeue_processing(item)
+                return
+            
             if result:
                 item.update(result)
                 item['status'] = 'ready_to_download'
@@ -321,15 +557,18 @@ class DownloadManager:
                 item['retry_count'] = 0
                 
                 self.processing_queue.remove(item)
-                self.download_queue.append(item)
+                with self._queue_lock:
+                    self.download_queue.append(item)
                 
                 self.progress(item['id'], 100, f"Link pronto")
-                self.log(f"Link adicional gerado: {item['title'][:50]}...", "DEBUG")
+                if self._log_debug_enabled:
+                    self.log(f"Link adicional gerado: {item['title'][:50]}...", "DEBUG")
             else:
-                item['retry_count'] = item.get('retry_count', 0) + 1
+                item['retry_count'] = item['retry_count'] + 1
                 
                 if item['retry_count'] <= 2:
-                    self.pending_queue.insert(0, item)
+                    with self._queue_lock:
+                        self.pending_queue.append(item)
                 else:
                     item['status'] = 'failed'
                     item['error'] = "Falha após 3 tentativas"
@@ -341,6 +580,10 @@ class DownloadManager:
                     self.progress(item['id'], 0, f"Erro: {item['error']}")
         
         except Exception as e:
+            if self._stop_event.is_set():
+                self._requeue_processing(item)
+                return
+            
             item['status'] = 'failed'
             item['error'] = str(e)[:80]
             
@@ -353,20 +596,23 @@ class DownloadManager:
         self.save_database()
     
     def _download_with_retry(self, item, max_retries=5):
-        aria2_path = self._find_aria2()
-        if not aria2_path:
+        if not self._ensure_aria2_rpc():
             item['status'] = 'failed'
-            item['error'] = 'aria2c não encontrado'
-            self.failed_list.append(item)
+            if self._find_aria2():
+                item['error'] = 'Falha ao iniciar aria2c RPC'
+            else:
+                item['error'] = 'aria2c não encontrado'
             return False
         
-        download_folder = config.get_download_folder()
-        temp_folder = self._ensure_aria2_temp_folder()
+        if self._download_folder is None:
+            self._lazy_folders()
+        download_folder = self._download_folder
+        temp_folder = self._temp_folder
         
         title_clean = self._clean_filename(item['title'])
         filename = f"{title_clean} [{item['quality']}]"
         
-        ext = '.m4a' if item['quality'] in ['48k', '128k'] else '.mp4'
+        ext = '.m4a' if item['quality'] in _AUDIO_QUALITIES else '.mp4'
         filename += ext
         
         final_filepath = download_folder / filename
@@ -376,99 +622,72 @@ class DownloadManager:
             try:
                 if not item['download_url'] or not item['download_url'].startswith('http'):
                     self.log(f"URL inválida para download", "WARNING")
-                    time.sleep(5)
+                    if self._stop_event.wait(5):
+                        return False
                     continue
                 
                 current_time = time.time()
-                if item.get('last_retry_time', 0) > current_time - 10:
-                    time.sleep(10)
+                if item['last_retry_time'] > current_time - 10:
+                    if self._stop_event.wait(10):
+                        return False
+                
+                self._pause_event.wait()
+                
+                if self._stop_event.is_set():
+                    return False
+                
+                is_audio = item['quality'] in _AUDIO_QUALITIES
+                connections = '4' if is_audio else '16'
                 
-                cmd = [
-                    aria2_path,
-                    '-x', '16',
-                    '-s', '16',
-                    '-k', '2M',
-                    '-o', filename,
-                    '-d', str(temp_folder),
-                    '--check-certificate=false',
-                    '--retry-wait=5',
-                    '--max-tries=5',
-                    '--timeout=60',
-                    '--connect-timeout=30',
-                    '--max-file-not-found=5',
-                    '--allow-overwrite=true',
-                    '--auto-file-renaming=false',
-                    '--continue=true',
-                    item['download_url']
-                ]
+                options = {
+                    'dir': str(temp_folder),
+                    'out': filename,
+                    'max-connection-per-server': connections,
+                    'split': connections,
+                    'min-split-size': '1M' if is_audio else '2M',
+                }
                 
                 self.log(f"Tentativa {attempt + 1}/{max_retries}: Baixando {filename[:50]}...")
                 
-
-
-                startupinfo = None
-                creationflags = 0
-
-                if sys.platform == 'win32':
-                    startupinfo = subprocess.STARTUPINFO()
-                    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                    startupinfo.wShowWindow = subprocess.SW_HIDE
-                    
-                    creationflags = subprocess.CREATE_NO_WINDOW
-
-                process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    bufsize=1,
-                    universal_newlines=True,
-                    encoding='utf-8',
-                    errors='ignore',
-                    startupinfo=startupinfo,
-                    creationflags=creationflags
-                )
+                gid = self._rpc('aria2.addUri', [item['download_url']], options)
                 
-                self.active_processes[item['id']] = process
-                last_progress = self.download_progress.get(item['id'], 0)
+                self.active_processes[item['id']] = gid
+                last_progress = item['_percent']
                 last_update_time = time.time()
                 
                 while True:
-                    if self.stopped:
-                        process.terminate()
-                        del self.active_processes[item['id']]
-                        return False
+                    self._pause_event.wait()
                     
-                    if self.paused:
-                        while self.paused and not self.stopped:
-                            time.sleep(1)
-                        if self.stopped:
-                            process.terminate()
-                            del self.active_processes[item['id']]
-                            return False
+                    if self._stop_event.is_set():
+                        break
                     
-                    output = process.stdout.readline()
+                    status = self._rpc('aria2.tellStatus', gid, _ARIA2_STATUS_KEYS)
                     
-                    if output == '' and process.poll() is not None:
+                    if status['status'] in ('complete', 'error', 'removed'):
                         break
                     
-                    if output:
-                        percent = self._parse_aria2_progress(output)
-                        current_time = time.time()
-                        
-                        if percent > last_progress or current_time - last_update_time > 2:
-                            last_progress = percent
-                            last_update_time = current_time
-                            self.progress(item['id'], percent, f"Baixando")
+                    total = int(status['totalLength'])
+                    percent = int(status['completedLength']) * 100 // total if total else 0
+                    current_time = time.time()
+                    elapsed = current_time - last_update_time
+                    
+                    if (percent > last_progress and elapsed >= 0.25) or elapsed > 2:
+                        last_progress = percent
+                        last_update_time = current_time
+                        self.progress(item['id'], percent, f"Baixando")
                     
-                    time.sleep(0.1)
+                    self._stop_event.wait(0.5)
+                
+                if self._stop_event.is_set():
+                    self._discard_download(item['id'])
+                    return False
                 
-                stdout, stderr = process.communicate()
                 del self.active_processes[item['id']]
+                self._rpc_quiet('aria2.removeDownloadResult', gid)
                 
-                if process.returncode == 0 and temp_filepath.exists():
+                if status['status'] == 'complete' and temp_filepath.exists():
                     moved = self._move_from_temp_to_final(temp_filepath, final_filepath)
-                    if moved and final_filepath.exists():
+                    if moved:
                         filesize = final_filepath.stat().st_size / (1024 * 1024)
                         item['status'] = 'completed'
                         item['file_size'] = f"{filesize:.2f} MB"
@@ -480,11 +699,8 @@ class DownloadManager:
                         error_msg = "Falha ao mover arquivo da pasta temporária"
                         self.log(f"Tentativa {attempt + 1} falhou: {error_msg}", "WARNING")
                 else:
-                    error_msg = ""
-                    if stderr:
-                        error_msg = stderr[:150]
-                    elif stdout:
-                        error_msg = stdout[:150]
+                    error_code = status.get('errorCode', '')
+                    error_msg = status.get('errorMessage', '')[:150]
                     
                     if not error_msg:
                         error_msg = "Erro desconhecido"
@@ -493,40 +709,72 @@ class DownloadManager:
                         self.log(f"URL de download inválida ou expirada", "ERROR")
                         item['error'] = "URL inválida/Expirada"
                         return False
-                    elif 'No such file or directory' in error_msg or 'Not Found' in error_msg:
+                    elif error_code in ('3', '4') or 'Not Found' in error_msg:
                         self.log(f"Arquivo não encontrado no servidor", "ERROR")
                         item['error'] = "Arquivo não encontrado"
                         if attempt < max_retries - 1:
-                            item['download_retry_count'] = item.get('download_retry_count', 0) + 1
+                            item['download_retry_count'] = item['download_retry_count'] + 1
                             item['last_retry_time'] = time.time()
-                            time.sleep(10)
+                            if self._stop_event.wait(10):
+                                return False
                             continue
                     else:
                         self.log(f"Tentativa {attempt + 1} falhou: {error_msg}", "WARNING")
                         
                         if attempt < max_retries - 1:
-                            item['download_retry_count'] = item.get('download_retry_count', 0) + 1
+                            item['download_retry_count'] = item['download_retry_count'] + 1
                             item['last_retry_time'] = time.time()
                             wait_time = min(30, 5 * (attempt + 1))
                             self.log(f"Aguardando {wait_time} segundos antes de tentar novamente...", "INFO")
-                            time.sleep(wait_time)
+                            if self._stop_event.wait(wait_time):
+                                return False
                             continue
             
-            except subprocess.TimeoutExpired:
+            except requests.exceptions.Timeout:
+                self._discard_download(item['id'])
                 self.log(f"Timeout na tentativa {attempt + 1}", "WARNING")
                 if attempt < max_retries - 1:
-                    time.sleep(10)
+                    if self._stop_event.wait(10):
+                        return False
             except Exception as e:
+                self._discard_download(item['id'])
                 self.log(f"Erro na tentativa {attempt + 1}: {str(e)[:80]}", "ERROR")
                 if attempt < max_retries - 1:
-                    time.sleep(10)
+                    if self._stop_event.wait(10):
+                        return False
         
         item['status'] = 'failed'
         if not item.get('error'):
             item['error'] = f"Falhou após {max_retries} tentativas"
         return False
     
+    def _requeue_pending(self, item):
+        item['status'] = 'pending'
+        item['download_url'] = None
+        item['last_attempt'] = 0.0
+        with self._queue_lock:
+            self.pending_queue.appendleft(item)
+    
+    def _requeue_processing(self, item):
+        if item in self.processing_queue:
+            self.processing_queue.remove(item)
+        self._requeue_pending(item)
+        self.save_database()
+    
+    def _return_ready_to_pending(self):
+        with self._queue_lock:
+            while self.download_queue:
+                item = self.download_queue.pop()
+                item['status'] = 'pending'
+                item['download_url'] = None
+                item['last_attempt'] = 0.0
+                self.pending_queue.appendleft(item)
+    
     def _download_worker(self, item):
+        if self._stop_event.is_set():
+            self._requeue_pending(item)
+            return
+        
         item['status'] = 'downloading'
         self.downloading.append(item)
         self.save_database()
@@ -539,13 +787,17 @@ class DownloadManager:
             self.downloading.remove(item)
             self.completed_list.append(item)
             self.progress(item['id'], 100, f"Download completo")
+        elif self._stop_event.is_set():
+            self.downloading.remove(item)
+            self._requeue_pending(item)
+            self.progress(item['id'], 0, f"Interrompido")
         else:
             self.downloading.remove(item)
             self.failed_list.append(item)
             self.progress(item['id'], 0, f"Falhou")
             self.log(f"Erro no download: {item.get('error', 'Erro desconhecido')}", "ERROR")
         
-        if self.pending_queue and not self.stopped and not self.paused:
+        if self.pending_queue and not self._stop_event.is_set() and self._pause_event.is_set():
             active_downloads = len(self.downloading)
             max_downloads = config.get_max_downloads()
             links_needed = max(0, max_downloads - active_downloads - len(self.download_queue))
@@ -556,13 +808,27 @@ class DownloadManager:
         self.save_database()
 
     def reset_state(self):
-        self.stopped = False
+        self._stop_event.clear()
         self.active_generators = 0
         
         self.log("Estado de geração resetado", "INFO")
     
+    def _lazy_pools(self, max_links, max_downloads):
+        if self._pool_sizes == (max_links, max_downloads):
+            return
+        
+        if self.gen_pool:
+            self.gen_pool.shutdown(wait=False)
+        if self.dl_pool:
+            self.dl_pool.shutdown(wait=False)
+        
+        self.gen_pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_links, thread_name_prefix="gen")
+        self.dl_pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_downloads, thread_name_prefix="dl")
+        self._pool_sizes = (max_links, max_downloads)
+    
     def process_queue(self):
-        self.stopped = False
+        self._stop_event.clear()
+        self._download_folder = None
         
         self.log("Iniciando processamento da fila...")
         
@@ -570,34 +836,28 @@ class DownloadManager:
             self.log("Fila vazia")
             return
         
+        max_links = config.get_max_links()
         max_downloads = config.get_max_downloads()
-        max_generators = min(config.get_max_links(), max_downloads)
-        generator_threads = []
+        max_generators = min(max_links, max_downloads)
+        self._lazy_pools(max_links, max_downloads)
         
         self.active_generators = max_generators
         quality = config.get_quality()
         
         self.log(f"Gerando {len(self.pending_queue)} links ({max_generators} paralelo)...")
         
-        for _ in range(max_generators):
-            thread = threading.Thread(
-                target=self._generator_worker,
-                args=(quality,),
-                daemon=True
-            )
-            thread.start()
-            generator_threads.append(thread)
-            time.sleep(0.5)
-        
-        for thread in generator_threads:
-            try:
-                thread.join(timeout=600)
-            except:
-                pass
+        gen_futures = [
+            self.gen_pool.submit(self._generator_worker, quality)
+            for _ in range(max_generators)
+        ]
+        _, not_done = concurrent.futures.wait(gen_futures, timeout=600)
+        for future in not_done:
+            future.cancel()
         
         self.log(f"Links gerados: {len(self.download_queue)} prontos, {len(self.failed_list)} erros")
         
-        if self.stopped:
+        if self._stop_event.is_set():
+            self._return_ready_to_pending()
             self.log("Processamento interrompido pelo usuário")
             return
         
@@ -605,97 +865,144 @@ class DownloadManager:
             self.log("Nenhum vídeo pronto para download")
             return
         
-        max_downloads = config.get_max_downloads()
         self.log(f"Baixando {len(self.download_queue)} vídeos ({max_downloads} paralelo)...")
         
-        download_threads = []
-        items_to_download = self.download_queue.copy()
+        dl_futures = set()
         
-        while items_to_download and not self.stopped:
-            if len(items_to_download) < max_downloads * 2 and self.pending_queue:
-                self._generate_additional_links(max_downloads - len(items_to_download), quality)
-                items_to_download = self.download_queue.copy()
+        while not self._stop_event.is_set():
+            if len(self.download_queue) < max_downloads and self.pending_queue:
+                self._generate_additional_links(max_downloads - len(self.download_queue), quality)
             
-            if len([t for t, _ in download_threads if t.is_alive()]) < max_downloads:
-                item = items_to_download.pop(0)
-                
-                thread = threading.Thread(
-                    target=self._download_worker,
-                    args=(item,),
-                    daemon=True
-                )
-                thread.start()
-                download_threads.append((thread, item))
-                
-                time.sleep(1)
-            else:
-                time.sleep(0.5)
+            while len(dl_futures) < max_downloads and not self._stop_event.is_set():
+                try:
+                    with self._queue_lock:
+                        item = self.download_queue.popleft()
+                except IndexError:
+                    break
+                dl_futures.add(self.dl_pool.submit(self._download_worker, item))
+            
+            if not dl_futures:
+                break
             
-            download_threads = [(t, i) for t, i in download_threads if t.is_alive()]
+            _, dl_futures = concurrent.futures.wait(dl_futures, return_when=concurrent.futures.FIRST_COMPLETED)
         
-        for thread, _ in download_threads:
-            try:
-                thread.join(timeout=1800)
-            except:
-                pass
+        _, not_done = concurrent.futures.wait(dl_futures, timeout=1800)
+        for future in not_done:
+            future.cancel()
         
-        self.download_queue.clear()
-        self.pending_queue.clear()
-        self.downloading.clear()
+        if self._stop_event.is_set():
+            self._return_ready_to_pending()
         
         self.log(f"Processamento completo: {len(self.completed_list)} sucesso, {len(self.failed_list)} erros")
-        self.save_database()
+        self._write_database_now()
+    
+    def shutdown(self):
+        self._stop_event.set()
+        self._pause_event.set()
+        if self.gen_pool:
+            self.gen_pool.shutdown(wait=True, cancel_futures=True)
+        if self.dl_pool:
+            self.dl_pool.shutdown(wait=True, cancel_futures=True)
+    
+    def close(self):
+        self.shutdown()
+        self._return_ready_to_pending()
+        self._stop_aria2_rpc()
+        self._write_database_now()
     
     def pause_downloads(self):
-        self.paused = True
+        self._pause_event.clear()
+        if self._aria2_rpc:
+            self._rpc_quiet('aria2.forcePauseAll')
         self.log("Downloads pausados - aguardando para retomar")
     
     def resume_downloads(self):
-        self.paused = False
+        self._pause_event.set()
+        if self._aria2_rpc:
+            self._rpc_quiet('aria2.unpauseAll')
         self.log("Downloads retomados")
     
     def stop_generation(self):
-        self.stopped = True
+        self._stop_event.set()
+        self._pause_event.set()
         
-        for item_id, process in list(self.active_processes.items()):
-            item = self._find_item_by_id(item_id)
-            if item and item.get('status') == 'processing':
-                try:
-                    process.terminate()
-                    self.log(f"Processo de geração {item_id} terminado", "DEBUG")
-                except:
-                    pass
+        for item_id, gid in list(self.active_processes.items()):
+            self._rpc_quiet('aria2.remove', gid)
+            if self._log_debug_enabled:
+                self.log(f"Download {item_id} interrompido", "DEBUG")
         
         self.log("Geração de links parada - downloads continuarão até terminar")
     
     def save_database(self):
+        self._db_dirty.set()
+    
+    def _database_writer(self):
+        while True:
+            self._db_dirty.wait()
+            time.sleep(2.0)
+            self._db_dirty.clear()
+            self._write_database_now()
+    
+    @staticmethod
+    def _persistable(item):
+        return {k: v for k, v in item.items() if not k.startswith('_')}
+    
+    def _write_database_now(self):
         try:
-            data = {
-                'pending': self.pending_queue,
-                'processing': self.processing_queue,
-                'download_ready': self.download_queue,
-                'downloading': self.downloading,
-                'completed': self.completed_list,
-                'failed': self.failed_list,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            with open(config.DATABASE_FILE, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            with self._db_lock:
+                with self._queue_lock:
+                    pending = [self._persistable(it) for it in self.pending_queue]
+                    download_ready = [self._persistable(it) for it in self.download_queue]
+                
+                data = {
+                    'pending': pending,
+                    'processing': [self._persistable(it) for it in self.processing_queue],
+                    'download_ready': download_ready,
+                    'downloading': [self._persistable(it) for it in self.downloading],
+                    'completed': [self._persistable(it) for it in self.completed_list],
+                    'failed': [self._persistable(it) for it in self.failed_list],
+                    'timestamp': datetime.now().isoformat()
+                }
+                
+                temp_file = config.DATABASE_FILE.with_suffix('.tmp')
+                if orjson:
+                    with open(temp_file, 'wb') as f:
+                        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+                else:
+                    with open(temp_file, 'w', encoding='utf-8') as f:
+                        json.dump(data, f, indent=2, ensure_ascii=False)
+                os.replace(temp_file, config.DATABASE_FILE)
         except Exception as e:
+            self._db_dirty.set()
             self.log(f"Erro ao salvar database: {e}", "ERROR")
     
     def load_database(self):
         try:
             if config.DATABASE_FILE.exists():
-                with open(config.DATABASE_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.pending_queue = data.get('pending', [])
+                with open(config.DATABASE_FILE, 'rb') as f:
+                    raw = f.read()
+                    data = orjson.loads(raw) if orjson else json.loads(raw)
+                    self.pending_queue = deque(data.get('pending', []))
                     self.processing_queue = data.get('processing', [])
-                    self.download_queue = data.get('download_ready', [])
+                    self.download_queue = deque(data.get('download_ready', []))
                     self.downloading = data.get('downloading', [])
                     self.completed_list = data.get('completed', [])
                     self.failed_list = data.get('failed', [])
+                    self._items_by_id = {
+                        it['id']: it
+                        for lst in (self.pending_queue, self.processing_queue, self.download_queue,
+                                    self.downloading, self.completed_list, self.failed_list)
+                        for it in lst
+                    }
+                    for it in self._items_by_id.values():
+                        it.setdefault('retry_count', 0)
+                        it.setdefault('last_attempt', 0.0)
+                        it.setdefault('download_retry_count', 0)
+                        it.setdefault('last_retry_time', 0.0)
+                        it.setdefault('channel', None)
+                        it.setdefault('extension', None)
+                        it.setdefault('timestamp', None)
+                        it.setdefault('_percent', 0)
                     self.log(f"Database carregado: {len(self.pending_queue)} pendentes")
         except Exception as e:
             self.log(f"Erro ao carregar database: {e}", "ERROR")
@@ -10,8 +10,9 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from core.config import config
 
 class LinkGenerator:
-    def __init__(self, log_callback=None):
+    def __init__(self, log_callback=None, stop_event=None):
         self.log_callback = log_callback or self._default_log
+        self.stop_event = stop_event
         self.proxy_url = "https://ytdown.to/proxy.php"
         self.session = requests.Session()
         self.session.headers.update({
@@ -32,6 +33,12 @@ class LinkGenerator:
     def log(self, msg, level="INFO"):
         self.log_callback(msg, level)
     
+    def _wait(self, seconds):
+        if self.stop_event:
+            return self.stop_event.wait(seconds)
+        time.sleep(seconds)
+        return False
+    
     def get_video_data(self, youtube_url, max_retries=2):
         for attempt in range(max_retries):
             try:
@@ -44,12 +51,14 @@ class LinkGenerator:
                 except requests.exceptions.Timeout:
                     self.log(f"Timeout na conexão (15s) tentativa {attempt+1}", "ERROR")
                     if attempt < max_retries - 1:
-                        time.sleep(2)
+                        if self._wait(2):
+                            return None
                     continue
                 except requests.exceptions.ConnectionError:
                     self.log(f"Erro de conexão tentativa {attempt+1}", "ERROR")
                     if attempt < max_retries - 1:
-                        time.sleep(3)
+                        if self._wait(3):
+                            return None
                     continue
                 
                 try:
@@ -57,13 +66,15 @@ class LinkGenerator:
                 except json.JSONDecodeError:
                     self.log(f"Resposta não é JSON válido", "ERROR")
                     if attempt < max_retries - 1:
-                        time.sleep(2)
+                        if self._wait(2):
+                            return None
                     continue
                 
                 if 'api' not in data:
                     self.log("Resposta inválida da API (sem 'api' field)", "ERROR")
                     if attempt < max_retries - 1:
-                        time.sleep(2)
+                        if self._wait(2):
+                            return None
                     continue
                 
                 api = data['api']
@@ -72,13 +83,15 @@ class LinkGenerator:
                     error_msg = api.get('message', 'Erro desconhecido')
                     self.log(f"Erro da API: {error_msg}", "ERROR")
                     if attempt < max_retries - 1:
-                        time.sleep(2)
+                        if self._wait(2):
+                            return None
                     continue
                 
                 if not api.get('mediaItems'):
                     self.log("Nenhum formato de mídia encontrado", "ERROR")
                     if attempt < max_retries - 1:
-                        time.sleep(2)
+                        if self._wait(2):
+                            return None
                     continue
                 
                 self.log(f"Dados obtidos com sucesso", "INFO")
@@ -96,7 +109,8 @@ class LinkGenerator:
             except Exception as e:
                 self.log(f"Erro inesperado: {str(e)[:60]}", "ERROR")
                 if attempt < max_retries - 1:
-                    time.sleep(3)
+                    if self._wait(3):
+                        return None
         
         self.log(f"Falha após {max_retries} tentativas", "ERROR")
         return None
@@ -166,6 +180,9 @@ class LinkGenerator:
             return None
         
         while time.time() - start_time < timeout:
+            if self.stop_event and self.stop_event.is_set():
+                return None
+            
             try:
                 response = self.session.get(processing_url, timeout=10)
                 response.raise_for_status()
@@ -174,7 +191,8 @@ class LinkGenerator:
                     data = response.json()
                 except:
                     self.log(f"Resposta não é JSON válido", "WARNING")
-                    time.sleep(2)
+                    if self._wait(2):
+                        return None
                     continue
                 
                 percent_str = data.get('percent', '0%')
@@ -202,7 +220,8 @@ class LinkGenerator:
                     elif is_completed:
                         self.log(f"Processamento completo mas sem URL, tentando novamente...", "WARNING")
                         if time.time() - start_time < timeout - 5:
-                            time.sleep(2)
+                            if self._wait(2):
+                                return None
                             continue
                 
                 if percent_num != last_percent and percent_num > 0:
@@ -214,23 +233,28 @@ class LinkGenerator:
                     self.log(f"Sem progresso por 20 segundos", "WARNING")
                     break
                 
-                time.sleep(3)
+                if self._wait(3):
+                    return None
             
             except requests.exceptions.Timeout:
                 self.log(f"Timeout ao verificar progresso", "WARNING")
-                time.sleep(3)
+                if self._wait(3):
+                    return None
             except requests.exceptions.ConnectionError:
                 self.log(f"Erro de conexão ao verificar progresso", "WARNING")
-                time.sleep(5)
+                if self._wait(5):
+                    return None
             except Exception as e:
                 self.log(f"Erro: {str(e)[:40]}", "WARNING")
-                time.sleep(3)
+                if self._wait(3):
+                    return None
         
         self.log(f"Timeout {timeout}s para {quality_name}", "WARNING")
         
         if attempt < max_retries:
             self.log(f"Nova tentativa em 5 segundos...", "WARNING")
-            time.sleep(5)
+            if self._wait(5):
+                return None
             return self.get_download_url(processing_url, quality_name, timeout, attempt + 1)
         
         return None
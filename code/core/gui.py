@@ -49,7 +49,8 @@ class YouTubeDownloaderGUI:
     def setup_manager(self):
         self.manager = DownloadManager(
             log_callback=self.log_message,
-            progress_callback=self.update_item_progress
+            progress_callback=self.update_item_progress,
+            progress_callback_batch=self.update_items_progress
         )
         self.manager.load_database()
         self.log_message("Sistema carregado")
@@ -334,7 +335,7 @@ class YouTubeDownloaderGUI:
     
     def remove_item_by_index(self, index):
         queue_map = {
-            "pending": self.manager.pending_queue,
+            "pending": self.manager.get_pending_items(),
             "downloading": self.manager.downloading,
             "completed": self.manager.completed_list,
             "failed": self.manager.failed_list
@@ -346,8 +347,14 @@ class YouTubeDownloaderGUI:
             item = queue[index]
             
             if messagebox.askyesno("Confirmar", f"Remover '{item['title'][:30]}...'?"):
-                queue.pop(index)
-                self.manager.save_database()
+                if self.current_list_type == "pending":
+                    if not self.manager.remove_pending_item(item):
+                        self.log_message("Erro: Item não encontrado", "ERROR")
+                        self.refresh_lists()
+                        return
+                else:
+                    del queue[index]
+                    self.manager.save_database()
                 self.refresh_lists()
                 self.log_message(f"Removido: {item['title'][:50]}...")
         else:
@@ -383,7 +390,7 @@ class YouTubeDownloaderGUI:
             return
         
         queue_map = {
-            "pending": self.manager.pending_queue,
+            "pending": self.manager.get_pending_items(),
             "downloading": self.manager.downloading,
             "completed": self.manager.completed_list,
             "failed": self.manager.failed_list
@@ -444,7 +451,7 @@ class YouTubeDownloaderGUI:
                     text = f"{idx+1}. [{quality}] - ERRO: {error_short}"
                 
             elif self.current_list_type == "downloading":
-                progress = self.manager.download_progress.get(item['id'], 0)
+                progress = self.manager.get_progress(item['id'])
                 
                 if max_chars < 40:
                     bar_width = 8
@@ -498,7 +505,7 @@ class YouTubeDownloaderGUI:
         
         idx = selection[0]
         queue_map = {
-            "pending": self.manager.pending_queue,
+            "pending": self.manager.get_pending_items(),
             "downloading": self.manager.downloading,
             "completed": self.manager.completed_list,
             "failed": self.manager.failed_list
@@ -531,7 +538,7 @@ class YouTubeDownloaderGUI:
             return
         
         queue_map = {
-            "pending": self.manager.pending_queue,
+            "pending": self.manager.get_pending_items(),
             "downloading": self.manager.downloading,
             "completed": self.manager.completed_list,
             "failed": self.manager.failed_list
@@ -540,9 +547,12 @@ class YouTubeDownloaderGUI:
         queue = queue_map.get(self.current_list_type, [])
         
         if queue:
-            count = len(queue)
-            queue.clear()
-            self.manager.save_database()
+            if self.current_list_type == "pending":
+                count = self.manager.clear_pending()
+            else:
+                count = len(queue)
+                queue.clear()
+                self.manager.save_database()
             self.refresh_lists()
             self.log_message(f"Lista {self.current_list_type} limpa ({count} itens removidos)")
         else:
@@ -871,6 +881,10 @@ class YouTubeDownloaderGUI:
         if self.current_list_type == "downloading":
             self.refresh_lists()
     
+    def update_items_progress(self, updates):
+        if self.current_list_type == "downloading":
+            self.root.after(0, self.refresh_lists)
+    
     def log_message(self, msg, level="INFO"):
         timestamp = datetime.now().strftime("%H:%M:%S")
         
@@ -895,6 +909,8 @@ def run_gui():
     root = ctk.CTk()
     app = YouTubeDownloaderGUI(root)
     root.mainloop()
+    if app.manager:
+        app.manager.close()
 
 if __name__ == "__main__":
     run_gui()
\ No newline at end of file